@@ -4,12 +4,14 @@ combine_activity_sessions.py
 
 Scan activity subfolders under a data root, find session subfolders under each
 activity's extracted/ directory, merge each session's Accelerometer and Gyroscope CSVs
-on their timestamp column, and produce per-activity combined CSVs.
+on their timestamp column, and produce per-activity combined files (Parquet by
+default; --format csv or --format both for CSV output).
 
 Now supports a --name / -n argument. If provided, the sanitized name will be
 prepended to the output filename, e.g. "omar_jumping_combined.csv".
 
-Output per-activity file layout (one file per activity):
+Output per-activity file layout (one file per activity and format):
+    <out_dir>/<name_><activity>_combined.parquet
     <out_dir>/<name_><activity>_combined.csv
 
 Columns (ordered):
@@ -27,178 +29,354 @@ Usage:
 """
 from __future__ import annotations
 import argparse
+import functools
+import importlib.util
+import itertools
 import os
 import re
 import sys
-from typing import Dict, List, Optional, Tuple
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 import pandas as pd
 
-# Keywords for file detection
-ACCEL_KEYWORDS = ("accelerometer", "accel")
-GYRO_KEYWORDS = ("gyroscope", "gyro")
+# Sensor file names, e.g. Accelerometer.csv, accel_2.csv, Gyroscope.csv
+_SENSOR_RE = re.compile(r"^(accel(?:erometer)?|gyro(?:scope)?)[a-z0-9_\-]*\.csv$", re.I)
 
 # Default order of output columns
-OUTPUT_COLS = ["timestamp", "accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z"]
+OUTPUT_COLS = ("timestamp", "accel_x", "accel_y", "accel_z", "gyro_x", "gyro_y", "gyro_z")
 
+# Timestamp name fragments in order of preference ('time' also covers 'timestamp',
+# 'sec' covers 'seconds'), matched with one case-insensitive pattern
+_TS_PRIORITY = {"time": 0, "ts": 1, "sec": 2, "elapsed": 3}
+_TS_PRIORITY_RE = re.compile("|".join(_TS_PRIORITY), re.I)
 
-def find_activities(source_root: str) -> List[str]:
-    """Return activity directories directly under source_root (directories only)."""
-    items = []
-    for entry in sorted(os.listdir(source_root)):
-        full = os.path.join(source_root, entry)
-        if os.path.isdir(full):
-            items.append(full)
-    return items
+# Column-name patterns used by detect_xyz_columns
+_TS_RE = re.compile(r"time|timestamp|sec|elapsed", re.I)
+_SPLIT_RE = re.compile(r"[^a-z0-9]+")
 
+ACCEL_COLS = ["accel_x", "accel_y", "accel_z"]
+GYRO_COLS = ["gyro_x", "gyro_y", "gyro_z"]
 
-def find_session_dirs(activity_dir: str, extracted_subdir: str) -> List[str]:
-    """Return list of session directories under activity_dir/<extracted_subdir>."""
+# Output file extension per --format value; "both" writes every format
+OUTPUT_FORMATS = {"parquet": ".parquet", "csv": ".csv"}
+PARQUET_COMPRESSION = "snappy"
+
+# Sensor readings (+-16 g / +-2000 dps) are stored as float32
+SENSOR_DTYPE = "float32"
+
+# Max distance (seconds) between an accel sample and the gyro sample it is paired with
+DEFAULT_MERGE_TOLERANCE = 0.02
+
+
+def scan_dir_sorted(path: str) -> List[os.DirEntry]:
+    """Return the DirEntry objects of path sorted by name (type info comes cached from the directory read)."""
+    with os.scandir(path) as it:
+        return sorted(it, key=lambda e: e.name)
+
+
+def iter_subdirs(path: str) -> Iterator[str]:
+    """Lazily yield the directories directly under path, in directory (unsorted) order."""
+    with os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                yield entry.path
+
+
+def find_activities(source_root: str) -> Iterator[str]:
+    """Yield activity directories directly under source_root (directories only, unsorted)."""
+    yield from iter_subdirs(source_root)
+
+
+def find_session_dirs(activity_dir: str, extracted_subdir: str) -> Iterator[str]:
+    """Yield session directories under activity_dir/<extracted_subdir> (unsorted)."""
     extracted_dir = os.path.join(activity_dir, extracted_subdir)
-    if not os.path.isdir(extracted_dir):
-        return []
-    sessions = []
-    for entry in sorted(os.listdir(extracted_dir)):
-        full = os.path.join(extracted_dir, entry)
-        if os.path.isdir(full):
-            sessions.append(full)
-    return sessions
+    if os.path.isdir(extracted_dir):
+        yield from iter_subdirs(extracted_dir)
+
+
+def iter_csv_dirs(root: str) -> Iterator[str]:
+    """
+    Yield root and every directory below it (not following symlinks) that directly
+    contains at least one .csv file, parents before children, siblings unsorted.
+    """
+    subdirs = []
+    has_csv = False
+    with os.scandir(root) as it:
+        entries = list(it)
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            subdirs.append(entry.path)
+        elif not has_csv and entry.name.lower().endswith(".csv") and entry.is_file():
+            has_csv = True
+    if has_csv:
+        yield root
+    for sub in subdirs:
+        yield from iter_csv_dirs(sub)
 
 
 def find_sensor_files_in_session(session_dir: str) -> Tuple[Optional[str], Optional[str]]:
     """
-    Find accel and gyro CSV paths in session_dir. Matching is case-insensitive and
-    looks for filenames containing 'accelerometer'/'accel' and 'gyroscope'/'gyro'.
+    Find accel and gyro CSV paths in session_dir. Matching is case-insensitive: file
+    names must start with 'accelerometer'/'accel' or 'gyroscope'/'gyro' and end in
+    '.csv'. If several files match, the first by name wins (e.g. 'Accelerometer.csv'
+    over 'AccelerometerUncalibrated.csv').
     """
-    accel = None
-    gyro = None
-    for f in sorted(os.listdir(session_dir)):
-        p = os.path.join(session_dir, f)
-        if not os.path.isfile(p):
+    found: Dict[str, str] = {}
+    for entry in scan_dir_sorted(session_dir):
+        m = _SENSOR_RE.match(entry.name)
+        if m and entry.is_file():
+            found.setdefault("accel" if m.group(1).lower().startswith("accel") else "gyro", entry.path)
+    return found.get("accel"), found.get("gyro")
+
+
+def choose_timestamp_column(columns: Sequence[str]) -> str:
+    """Pick most-likely timestamp column name from columns (prefers names containing time/timestamp/ts/seconds)."""
+    best = None
+    best_rank = len(_TS_PRIORITY)
+    for c in columns:
+        hits = _TS_PRIORITY_RE.findall(c)
+        if not hits:
             continue
-        low = f.lower()
-        if low.endswith(".csv") and any(k in low for k in ACCEL_KEYWORDS):
-            accel = p
-        if low.endswith(".csv") and any(k in low for k in GYRO_KEYWORDS):
-            gyro = p
-    return accel, gyro
-
-
-def choose_timestamp_column(df: pd.DataFrame) -> str:
-    """Pick most-likely timestamp column name from df (prefers names containing time/timestamp/ts/seconds)."""
-    for pattern in (r"time", r"timestamp", r"ts", r"seconds", r"sec", r"elapsed"):
-        for c in df.columns:
-            if re.search(pattern, c, flags=re.I):
-                return c
+        rank = min(_TS_PRIORITY[h.lower()] for h in hits)
+        if rank < best_rank:
+            best, best_rank = c, rank
+            if rank == 0:
+                break
     # fallback: first column
-    return df.columns[0]
+    return best if best is not None else columns[0]
 
 
-def detect_xyz_columns(df: pd.DataFrame) -> Dict[str, str]:
+def detect_xyz_columns(columns: Sequence[str]) -> Dict[str, str]:
     """
     Detect column names for x,y,z axes. Returns mapping {'x': colname, ...}.
     Raises ValueError if not all found.
     """
-    mapping: Dict[str, str] = {}
-    cols = list(df.columns)
+    cols = list(columns)
+    # one pass over the columns; per axis keep the best match by rank:
+    # 0 = 'x' is a name token, 1 = name ends with 'x', 2 = name is 'x' after stripping
+    best: Dict[str, Tuple[int, str]] = {}
     for col in cols:
         low = col.lower()
-        if re.search(r"time|timestamp|sec|elapsed", col, flags=re.I):
-            continue
-        tokens = re.split(r"[^a-z0-9]+", low)
-        tokens = [t for t in tokens if t]
+        is_time = _TS_RE.search(col) is not None
+        tokens = () if is_time else _SPLIT_RE.split(low)
+        stripped = low.strip()
         for axis in ("x", "y", "z"):
-            if axis in tokens and axis not in mapping:
-                mapping[axis] = col
-    # try suffix match if any missing
-    for axis in ("x", "y", "z"):
-        if axis not in mapping:
-            for col in cols:
-                if col.lower().endswith(axis) and axis not in mapping:
-                    mapping[axis] = col
-    # final fallback: single-letter columns named 'x','y','z'
-    for axis in ("x", "y", "z"):
-        if axis not in mapping:
-            for col in cols:
-                if col.strip().lower() == axis:
-                    mapping[axis] = col
+            if axis in tokens:
+                rank = 0
+            elif low.endswith(axis):
+                rank = 1
+            elif stripped == axis:
+                rank = 2
+            else:
+                continue
+            if axis not in best or rank < best[axis][0]:
+                best[axis] = (rank, col)
+    mapping = {axis: col for axis, (_, col) in best.items()}
     if len(mapping) != 3:
         raise ValueError(f"Couldn't detect all axes in columns: {cols}. Found: {mapping}")
     return mapping
 
 
-def safe_read_csv(path: str) -> pd.DataFrame:
-    """Read CSV with pandas using python engine (more permissive)."""
-    return pd.read_csv(path, engine="python")
+def read_csv_columns(path: str) -> List[str]:
+    """Return the column names of a CSV by parsing its header only."""
+    return list(pd.read_csv(path, nrows=0).columns)
 
 
-def merge_session(accel_path: str, gyro_path: str, verbose: bool = False) -> pd.DataFrame:
+def safe_read_csv(path: str, usecols: Optional[Sequence[str]] = None) -> pd.DataFrame:
     """
-    Merge one session's accelerometer and gyroscope CSVs on timestamp.
-    Returns DataFrame with columns: timestamp, accel_x/y/z, gyro_x/y/z (where available).
+    Read CSV with the fastest pandas parser that accepts the file: pyarrow (Arrow-backed
+    columns), then the C engine, and only on real parse errors the permissive python engine.
+    If usecols is given only those columns are parsed.
     """
-    a = safe_read_csv(accel_path)
-    g = safe_read_csv(gyro_path)
+    if usecols is not None:
+        usecols = list(dict.fromkeys(usecols))
+    try:
+        return pd.read_csv(path, usecols=usecols, engine="pyarrow", dtype_backend="pyarrow")
+    except (ImportError, ValueError):
+        # pyarrow not installed, or it rejected the file (ArrowInvalid is a ValueError)
+        pass
+    try:
+        return pd.read_csv(path, usecols=usecols, engine="c", low_memory=False)
+    except pd.errors.ParserError:
+        return pd.read_csv(path, usecols=usecols, engine="python")
 
-    ts_a = choose_timestamp_column(a)
-    ts_g = choose_timestamp_column(g)
+
+def timestamp_tolerance(ts: pd.Series, seconds: float):
+    """
+    Express a tolerance given in seconds in the units of the timestamp column:
+    integer timestamps are epoch nanoseconds, float timestamps are seconds.
+    """
+    if pd.api.types.is_integer_dtype(ts):
+        return int(round(seconds * 1e9))
+    return float(seconds)
+
+
+def merge_session_polars(
+    accel_path: str,
+    gyro_path: str,
+    verbose: bool = False,
+    tolerance: float = DEFAULT_MERGE_TOLERANCE,
+    log: Callable[[str], None] = print,
+) -> pd.DataFrame:
+    """
+    Polars implementation of merge_session: lazily scan both CSVs, keep only the
+    timestamp and axis columns, match on nearest timestamp and convert to pandas at the end.
+    """
+    try:
+        import polars as pl
+    except ImportError as e:
+        raise RuntimeError("--engine polars requires the 'polars' package (pip install polars)") from e
+
+    # header-only reads are enough to detect the timestamp/axis columns
+    header_a = pl.read_csv(accel_path, n_rows=0).columns
+    header_g = pl.read_csv(gyro_path, n_rows=0).columns
+    ts_a = choose_timestamp_column(header_a)
+    ts_g = choose_timestamp_column(header_g)
+    am = detect_xyz_columns(header_a)
+    gm = detect_xyz_columns(header_g)
 
     if verbose:
-        print(f" Session: accel_ts='{ts_a}', gyro_ts='{ts_g}'")
+        log(f" Session: accel_ts='{ts_a}', gyro_ts='{ts_g}'")
+        log(f"  accel cols -> {am}")
+        log(f"  gyro cols  -> {gm}")
+
+    def select(path: str, ts: str, mapping: Dict[str, str], prefix: str):
+        lf = pl.scan_csv(path).select(
+            pl.col(ts).alias("timestamp"),
+            *(pl.col(mapping[axis]).cast(pl.Float32).alias(f"{prefix}_{axis}") for axis in ("x", "y", "z")),
+        )
+        # integer (e.g. nanosecond) timestamps are kept as-is; anything else is coerced to float
+        if not lf.collect_schema()["timestamp"].is_numeric():
+            lf = lf.with_columns(pl.col("timestamp").cast(pl.Float64, strict=False))
+        return lf
+
+    a = select(accel_path, ts_a, am, "accel")
+    g = select(gyro_path, ts_g, gm, "gyro")
+    ts_dtype_a = a.collect_schema()["timestamp"]
+    if ts_dtype_a != g.collect_schema()["timestamp"]:
+        a = a.with_columns(pl.col("timestamp").cast(pl.Float64))
+        g = g.with_columns(pl.col("timestamp").cast(pl.Float64))
+        ts_dtype_a = pl.Float64
+    tol = int(round(tolerance * 1e9)) if ts_dtype_a.is_integer() else float(tolerance)
+
+    a = a.drop_nulls("timestamp").sort("timestamp")
+    g = g.drop_nulls("timestamp").sort("timestamp").with_columns(pl.col("timestamp").alias("gyro_ts"))
+
+    # join_asof(strategy="nearest") resolves ties towards the later gyro sample while
+    # pd.merge_asof picks the earlier one; join backward and forward and pick the closer
+    # match (earlier on ties) so both engines produce the same rows
+    fwd = g.rename({c: f"{c}_fwd" for c in (*GYRO_COLS, "gyro_ts")})
+    ts = pl.col("timestamp")
+    use_fwd = pl.col("gyro_ts_fwd").is_not_null() & (
+        pl.col("gyro_ts").is_null() | ((pl.col("gyro_ts_fwd") - ts) < (ts - pl.col("gyro_ts")))
+    )
+    merged = (
+        a.join_asof(g, on="timestamp", strategy="backward", tolerance=tol)
+        .join_asof(fwd, on="timestamp", strategy="forward", tolerance=tol)
+        .with_columns(pl.when(use_fwd).then(pl.col(f"{c}_fwd")).otherwise(pl.col(c)).alias(c) for c in GYRO_COLS)
+        .drop_nulls(GYRO_COLS)
+        .collect(engine="streaming")
+    )
+    # numpy-backed float32 columns are written to CSV in their short float32 form
+    merged = merged.to_pandas()
+
+    return merged[list(output_columns(tuple(merged.columns)))]
+
+
+def merge_session(
+    accel_path: str,
+    gyro_path: str,
+    verbose: bool = False,
+    engine: str = "pandas",
+    tolerance: float = DEFAULT_MERGE_TOLERANCE,
+    log: Callable[[str], None] = print,
+) -> pd.DataFrame:
+    """
+    Merge one session's accelerometer and gyroscope CSVs on timestamp.
+    Each accelerometer row is paired with the nearest gyroscope row no more than
+    `tolerance` seconds away; rows without such a partner are dropped.
+    Returns DataFrame with columns: timestamp, accel_x/y/z, gyro_x/y/z (where available).
+    engine selects the implementation: 'pandas' (default) or 'polars'.
+    Verbose diagnostics are passed to log (print by default).
+    """
+    if engine == "polars":
+        return merge_session_polars(accel_path, gyro_path, verbose=verbose, tolerance=tolerance, log=log)
 
-    # unify timestamp column name for merging
-    common_ts = ts_a if ts_a == ts_g else "timestamp"
-    if common_ts != ts_a:
-        a = a.rename(columns={ts_a: common_ts})
-    if common_ts != ts_g:
-        g = g.rename(columns={ts_g: common_ts})
+    # detect timestamp and axis columns from the headers, then parse only those columns
+    header_a = read_csv_columns(accel_path)
+    header_g = read_csv_columns(gyro_path)
 
-    # detect axis columns
-    am = detect_xyz_columns(a)
-    gm = detect_xyz_columns(g)
+    ts_a = choose_timestamp_column(header_a)
+    ts_g = choose_timestamp_column(header_g)
 
     if verbose:
-        print(f"  accel cols -> {am}")
-        print(f"  gyro cols  -> {gm}")
+        log(f" Session: accel_ts='{ts_a}', gyro_ts='{ts_g}'")
 
-    a_sel = a[[common_ts, am["x"], am["y"], am["z"]]].copy()
-    a_sel = a_sel.rename(columns={am["x"]: "accel_x", am["y"]: "accel_y", am["z"]: "accel_z"})
-    g_sel = g[[common_ts, gm["x"], gm["y"], gm["z"]]].copy()
-    g_sel = g_sel.rename(columns={gm["x"]: "gyro_x", gm["y"]: "gyro_y", gm["z"]: "gyro_z"})
-
-    # try to convert timestamp to numeric to help merging/sorting
-    try:
-        a_sel[common_ts] = pd.to_numeric(a_sel[common_ts], errors="coerce")
-        g_sel[common_ts] = pd.to_numeric(g_sel[common_ts], errors="coerce")
-    except Exception:
-        pass
+    am = detect_xyz_columns(header_a)
+    gm = detect_xyz_columns(header_g)
 
-    # inner join on timestamp (only matching timestamps retained)
-    merged = pd.merge(a_sel, g_sel, on=common_ts, how="inner", sort=True)
-    merged = merged.reset_index(drop=True)
-
-    # rename timestamp column to standard 'timestamp'
-    if common_ts != "timestamp":
-        merged = merged.rename(columns={common_ts: "timestamp"})
+    if verbose:
+        log(f"  accel cols -> {am}")
+        log(f"  gyro cols  -> {gm}")
+
+    a = safe_read_csv(accel_path, usecols=[ts_a, am["x"], am["y"], am["z"]])
+    g = safe_read_csv(gyro_path, usecols=[ts_g, gm["x"], gm["y"], gm["z"]])
+
+    # select in a fixed order and label the standard names in one step
+    a_sel = a.loc[:, [ts_a, am["x"], am["y"], am["z"]]].set_axis(["timestamp", *ACCEL_COLS], axis=1)
+    g_sel = g.loc[:, [ts_g, gm["x"], gm["y"], gm["z"]]].set_axis(["timestamp", *GYRO_COLS], axis=1)
+
+    # parsers already infer numeric timestamps; only coerce when one came back as text
+    for df in (a_sel, g_sel):
+        if not pd.api.types.is_numeric_dtype(df["timestamp"]):
+            df["timestamp"] = pd.to_numeric(df["timestamp"], errors="coerce")
+
+    # sensor readings fit comfortably in float32; the timestamp keeps full precision
+    a_sel = a_sel.astype(dict.fromkeys(ACCEL_COLS, SENSOR_DTYPE))
+    g_sel = g_sel.astype(dict.fromkeys(GYRO_COLS, SENSOR_DTYPE))
+
+    # merge_asof needs both keys sorted, free of NaN and of the same dtype
+    a_sel = a_sel.dropna(subset=["timestamp"])
+    g_sel = g_sel.dropna(subset=["timestamp"])
+    if a_sel["timestamp"].dtype != g_sel["timestamp"].dtype:
+        a_sel["timestamp"] = a_sel["timestamp"].astype("float64")
+        g_sel["timestamp"] = g_sel["timestamp"].astype("float64")
+    a_sel = a_sel.sort_values("timestamp", kind="stable")
+    g_sel = g_sel.sort_values("timestamp", kind="stable")
+
+    # pair each accel row with the nearest gyro row within tolerance; accel rows with no
+    # gyro sample close enough are dropped, so the result stays an inner match
+    merged = pd.merge_asof(
+        a_sel,
+        g_sel,
+        on="timestamp",
+        direction="nearest",
+        tolerance=timestamp_tolerance(a_sel["timestamp"], tolerance),
+    )
+    merged = merged.dropna(subset=GYRO_COLS, how="all").reset_index(drop=True)
 
     # ensure column ordering; if any missing keep what's present
-    cols_present = [c for c in OUTPUT_COLS if c in merged.columns]
-    merged = merged[cols_present]
+    merged = merged[list(output_columns(tuple(merged.columns)))]
     return merged
 
 
-def make_unique_path(path: str, overwrite: bool) -> str:
-    if overwrite or not os.path.exists(path):
-        return path
-    base, ext = os.path.splitext(path)
-    idx = 1
-    candidate = f"{base}_{idx}{ext}"
-    while os.path.exists(candidate):
+def make_unique_paths(base: str, exts: Iterable[str], overwrite: bool) -> List[str]:
+    """
+    Paths base + ext for every ext, with one shared '_N' suffix that is free for all of
+    them, so outputs written together keep matching names.
+    """
+    exts = list(exts)
+    candidates = [base + ext for ext in exts]
+    idx = 0
+    while not overwrite and any(os.path.exists(c) for c in candidates):
         idx += 1
-        candidate = f"{base}_{idx}{ext}"
-    return candidate
+        candidates = [f"{base}_{idx}{ext}" for ext in exts]
+    return candidates
 
 
+@functools.lru_cache(maxsize=16)
 def sanitize_name(name: str) -> str:
     """Sanitize provided name to safe lowercase token (letters, digits, underscore, dash)."""
     if not name:
@@ -212,6 +390,247 @@ def sanitize_name(name: str) -> str:
     return s
 
 
+def default_jobs(engine: str) -> int:
+    """
+    Number of worker processes when --jobs is not given: one per CPU, halved when the
+    CSV reader is itself multithreaded (pyarrow or polars) to avoid oversubscription.
+    """
+    cpus = os.cpu_count() or 1
+    if engine == "polars" or importlib.util.find_spec("pyarrow") is not None:
+        cpus //= 2
+    return max(1, cpus)
+
+
+# (merged frame or None, verbose log lines, error message or None) of one session merge
+SessionResult = Tuple[Optional[pd.DataFrame], List[str], Optional[str]]
+
+
+def merge_session_task(accel_path: str, gyro_path: str, **kwargs) -> SessionResult:
+    """
+    Run merge_session (usually in a worker process) and return (merged, log_lines, error)
+    instead of printing, so the parent can report each session's output in order.
+    """
+    lines: List[str] = []
+    try:
+        return merge_session(accel_path, gyro_path, log=lines.append, **kwargs), lines, None
+    except Exception as e:
+        return None, lines, str(e)
+
+
+def find_session_tasks(
+    sessions: List[str], args: argparse.Namespace, log: Callable[[str], None] = print
+) -> List[Tuple[str, str, str, str]]:
+    """
+    Locate each session's sensor files. Returns (session_dir, session_name, accel_path,
+    gyro_path) tuples; sessions missing a sensor file are reported through log and left out.
+    """
+    tasks = []
+    for sess in sessions:
+        sess_name = os.path.basename(os.path.normpath(sess))
+        accel_path, gyro_path = find_sensor_files_in_session(sess)
+        if not accel_path or not gyro_path:
+            if args.verbose:
+                log(f" Skipping session '{sess_name}' (missing accel or gyro)")
+            continue
+        tasks.append((sess, sess_name, accel_path, gyro_path))
+    return tasks
+
+
+def iter_session_results(
+    tasks: Iterable[Tuple[str, str, str, str]],
+    args: argparse.Namespace,
+    executor: Optional[Executor] = None,
+    window: int = 1,
+) -> Iterator[Tuple[str, str, SessionResult]]:
+    """
+    Merge the sessions of tasks and yield (session_dir, session_name, result) in task order.
+    With an executor at most `window` merges are submitted ahead of the consumer, so only
+    that many finished frames can pile up in this process; without one each session is
+    merged in this process when it is requested.
+    """
+    kwargs = {"verbose": args.verbose, "engine": args.engine, "tolerance": args.merge_tolerance}
+    if executor is None:
+        for sess, sess_name, accel_path, gyro_path in tasks:
+            yield sess, sess_name, merge_session_task(accel_path, gyro_path, **kwargs)
+        return
+
+    pending: Deque[Tuple[str, str, Future]] = deque()
+    task_iter = iter(tasks)
+
+    def submit_next() -> None:
+        for sess, sess_name, accel_path, gyro_path in itertools.islice(task_iter, 1):
+            pending.append((sess, sess_name, executor.submit(merge_session_task, accel_path, gyro_path, **kwargs)))
+
+    for _ in range(window):
+        submit_next()
+    while pending:
+        sess, sess_name, future = pending.popleft()
+        submit_next()
+        result = future.result()
+        del future
+        yield sess, sess_name, result
+
+
+def iter_merged_sessions(
+    results: Iterable[Tuple[str, str, SessionResult]], args: argparse.Namespace
+) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (session_name, merged) for the non-empty session results in order, with a leading
+    'session' column when args.add_session is set. Sessions that fail are reported and skipped.
+    """
+    for sess, sess_name, (merged, lines, error) in results:
+        for line in lines:
+            print(line)
+        if error is not None:
+            print(f" Failed to merge session '{sess}': {error}", file=sys.stderr)
+            continue
+        if merged.empty:
+            if args.verbose:
+                print(f"  Session '{sess_name}' produced no merged rows (no matching timestamps)")
+            continue
+
+        if args.add_session:
+            merged.insert(0, "session", sess_name)
+        yield sess_name, merged
+
+
+@functools.lru_cache(maxsize=16)
+def output_columns(columns: Tuple[str, ...]) -> Tuple[str, ...]:
+    """
+    Output column order for a frame with the given columns: 'session' first when
+    present, then OUTPUT_COLS that exist. Cached, since every session has the same columns.
+    """
+    cols = tuple(c for c in OUTPUT_COLS if c in columns)
+    if "session" in columns:
+        cols = ("session",) + cols
+    return cols
+
+
+def iter_matching_sessions(frames: Iterable[Tuple[str, pd.DataFrame]]) -> Iterator[Tuple[str, pd.DataFrame]]:
+    """
+    Yield (session_name, frame) with frames reduced to the output columns and converted to
+    the dtypes of the first session. A session that cannot be converted without losing
+    values (e.g. float timestamps after integer ones) is reported and skipped, whatever the
+    output format, so CSV and Parquet outputs hold the same sessions.
+    """
+    dtypes = None
+    for sess_name, df in frames:
+        if dtypes is None:
+            df = df[list(output_columns(tuple(df.columns)))]
+            dtypes = df.dtypes
+            yield sess_name, df
+            continue
+        try:
+            df = df[list(dtypes.index)]
+            for col in dtypes.index[df.dtypes != dtypes]:
+                converted = df[col].astype(dtypes[col])
+                if not converted.astype(df[col].dtype).equals(df[col]):
+                    raise ValueError(f"'{col}' would lose values as {dtypes[col]}")
+                df = df.assign(**{col: converted})
+        except (KeyError, ValueError, TypeError) as e:
+            print(f" Skipping session '{sess_name}': columns do not match the earlier sessions ({e})", file=sys.stderr)
+            continue
+        yield sess_name, df
+
+
+def import_pyarrow_parquet():
+    """Import pyarrow and pyarrow.parquet, with a clear error when pyarrow is missing."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet output requires the 'pyarrow' package (pip install pyarrow) or --format csv") from e
+    return pa, pq
+
+
+def write_activity(
+    out_paths: Dict[str, str],
+    frames: Iterable[Tuple[str, pd.DataFrame]],
+    created: List[str],
+    verbose: bool = False,
+) -> Tuple[int, int]:
+    """
+    Stream merged (session_name, frame) pairs one at a time (each already sorted by
+    timestamp) to every output in out_paths ({'csv': path, 'parquet': path}), so memory
+    use stays at one session. Each session becomes one Parquet row group; sessions whose
+    columns do not match the first one are left out (see iter_matching_sessions). Files
+    are only created once the first frame arrives, and each one is appended to created as
+    it is opened. Returns (rows_written, sessions_written).
+    """
+    rows = 0
+    count = 0
+    fh = None
+    writer = None
+    try:
+        for sess_name, df in iter_matching_sessions(frames):
+            table = None
+            if "parquet" in out_paths:
+                pa, pq = import_pyarrow_parquet()
+                table = pa.Table.from_pandas(df, preserve_index=False)
+            if "csv" in out_paths:
+                if fh is None:
+                    fh = open(out_paths["csv"], "w", newline="", buffering=1 << 20)
+                    created.append(out_paths["csv"])
+                    df.to_csv(fh, index=False)
+                else:
+                    df.to_csv(fh, index=False, header=False)
+            if table is not None:
+                if writer is None:
+                    writer = pq.ParquetWriter(out_paths["parquet"], table.schema, compression=PARQUET_COMPRESSION)
+                    created.append(out_paths["parquet"])
+                writer.write_table(table)
+            if verbose:
+                print(f"  Merged session '{sess_name}' -> {df.shape[0]} rows")
+            rows += df.shape[0]
+            count += 1
+    finally:
+        if fh is not None:
+            fh.close()
+        if writer is not None:
+            writer.close()
+    return rows, count
+
+
+def write_activity_sorted(
+    out_paths: Dict[str, str],
+    frames: Iterable[Tuple[str, pd.DataFrame]],
+    created: List[str],
+    verbose: bool = False,
+) -> Tuple[int, int]:
+    """
+    Concatenate all merged (session_name, frame) pairs, sort the result by timestamp and write it to
+    every output in out_paths, appending each path to created as it is opened. Holds the whole
+    activity in memory. Returns (rows_written, sessions_written).
+    """
+    sessions = list(iter_matching_sessions(frames))
+    if not sessions:
+        return 0, 0
+
+    activity_df = pd.concat([df for _, df in sessions], ignore_index=True, sort=False)
+
+    # sort by timestamp if present
+    if "timestamp" in activity_df.columns:
+        try:
+            activity_df = activity_df.sort_values(by="timestamp", kind="stable").reset_index(drop=True)
+        except Exception:
+            pass
+
+    if "csv" in out_paths:
+        with open(out_paths["csv"], "w", newline="", buffering=1 << 20) as fh:
+            created.append(out_paths["csv"])
+            activity_df.to_csv(fh, index=False)
+    if "parquet" in out_paths:
+        pa, pq = import_pyarrow_parquet()
+        table = pa.Table.from_pandas(activity_df, preserve_index=False)
+        with pq.ParquetWriter(out_paths["parquet"], table.schema, compression=PARQUET_COMPRESSION) as writer:
+            created.append(out_paths["parquet"])
+            writer.write_table(table)
+    if verbose:
+        for sess_name, df in sessions:
+            print(f"  Merged session '{sess_name}' -> {df.shape[0]} rows")
+    return activity_df.shape[0], len(sessions)
+
+
 def parse_args() -> argparse.Namespace:
     p = argparse.ArgumentParser(description="Combine accelerometer+gyroscope CSVs across extracted session folders per activity.")
     p.add_argument("--source-root", "-s", help="Root folder that contains activity subfolders (default: data)", default="data")
@@ -221,9 +640,20 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--name", "-n", help="Optional name to prepend to output filenames (e.g. Omar -> omar_activity_combined.csv)")
     p.add_argument("--add-session", action="store_true", help="Add 'session' column to aggregated per-activity output identifying the session folder")
     p.add_argument("--overwrite", action="store_true", help="Overwrite existing output files")
+    p.add_argument("--format", "-f", choices=("parquet", "csv", "both"), default="parquet", help="Output file format (default: parquet; both = parquet plus a CSV copy)")
+    p.add_argument("--deterministic", action="store_true", help="Process activities in name order; by default directory order is used (sessions are always in name order)")
+    p.add_argument("--global-sort", action="store_true", help="Sort each activity's rows by timestamp across all sessions (loads the whole activity into memory); by default sessions are streamed to disk one after another, each sorted by timestamp")
     p.add_argument("--recursive", "-r", action="store_true", help="Search for session folders recursively under extracted subdir")
+    p.add_argument("--merge-tolerance", type=float, default=DEFAULT_MERGE_TOLERANCE, help=f"Max seconds between paired accel/gyro samples (default: {DEFAULT_MERGE_TOLERANCE}; 0 = exact timestamps only)")
+    p.add_argument("--engine", choices=("pandas", "polars"), default="pandas", help="Library used to read and join session CSVs (default: pandas; polars must be installed separately)")
+    p.add_argument("--jobs", "-j", type=int, help="Number of sessions merged in parallel worker processes (default: CPU count, halved when pyarrow/polars is used; 1 = serial)")
     p.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
-    return p.parse_args()
+    args = p.parse_args()
+    if args.jobs is not None and args.jobs < 1:
+        p.error("--jobs must be at least 1")
+    if args.merge_tolerance < 0:
+        p.error("--merge-tolerance must not be negative")
+    return args
 
 
 def prompt_if_missing(val: Optional[str], prompt_text: str, default: Optional[str] = None) -> str:
@@ -252,7 +682,9 @@ def main():
     if args.activity:
         activities = [os.path.join(source_root, args.activity)]
     else:
+        # activities go to separate files, so directory order only affects the order they are reported in
         activities = find_activities(source_root)
+        activities = sorted(activities) if args.deterministic else list(activities)
 
     if not activities:
         print(f"No activity folders found under {source_root}", file=sys.stderr)
@@ -261,88 +693,83 @@ def main():
     os.makedirs(out_base, exist_ok=True)
     total_processed_activities = 0
 
-    for activity_dir in activities:
-        activity_name = os.path.basename(os.path.normpath(activity_dir))
-        if not os.path.isdir(activity_dir):
-            if args.verbose:
-                print(f"Skipping (not dir): {activity_dir}")
-            continue
-        sessions = find_session_dirs(activity_dir, extracted_subdir) if not args.recursive else []
-        if args.recursive:
-            # collect any folder under activity_dir that contains accel/gyro files
-            for root, dirs, files in os.walk(os.path.join(activity_dir, extracted_subdir) if os.path.isdir(os.path.join(activity_dir, extracted_subdir)) else activity_dir):
-                accel, gyro = find_sensor_files_in_session(root)
-                if accel or gyro:
-                    sessions.append(root)
-        if not sessions:
-            if args.verbose:
-                print(f"No sessions found for activity '{activity_name}' under {os.path.join(activity_dir, extracted_subdir)}")
-            continue
-
-        if args.verbose:
-            print(f"Processing activity '{activity_name}' with {len(sessions)} session(s)...")
-
-        per_activity_rows = []
-        processed_sessions = 0
-
-        for sess in sessions:
-            sess_name = os.path.basename(os.path.normpath(sess))
-            accel_path, gyro_path = find_sensor_files_in_session(sess)
-            if not accel_path or not gyro_path:
+    jobs = args.jobs if args.jobs is not None else default_jobs(args.engine)
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        # discover every activity's sessions first so workers stay busy across activities
+        planned = []
+        for activity_dir in activities:
+            activity_name = os.path.basename(os.path.normpath(activity_dir))
+            if not os.path.isdir(activity_dir):
                 if args.verbose:
-                    print(f" Skipping session '{sess_name}' (missing accel or gyro)")
+                    print(f"Skipping (not dir): {activity_dir}")
                 continue
-            try:
-                merged = merge_session(accel_path, gyro_path, verbose=args.verbose)
-            except Exception as e:
-                print(f" Failed to merge session '{sess}': {e}", file=sys.stderr)
-                continue
-            if merged.empty:
+            if args.recursive:
+                # any folder under the extracted dir (or the activity dir) holding CSV files is a session
+                extracted_dir = os.path.join(activity_dir, extracted_subdir)
+                sessions = sorted(iter_csv_dirs(extracted_dir if os.path.isdir(extracted_dir) else activity_dir))
+            else:
+                # sessions are written in this order, so keep it stable across machines
+                sessions = sorted(find_session_dirs(activity_dir, extracted_subdir))
+            if not sessions:
                 if args.verbose:
-                    print(f"  Session '{sess_name}' produced no merged rows (no matching timestamps)")
+                    print(f"No sessions found for activity '{activity_name}' under {os.path.join(activity_dir, extracted_subdir)}")
                 continue
 
-            if args.add_session:
-                merged = merged.copy()
-                merged.insert(0, "session", sess_name)
-
-            per_activity_rows.append(merged)
-            processed_sessions += 1
+            # held back and printed when the activity is written, next to its merge output
+            lines: List[str] = []
             if args.verbose:
-                print(f"  Merged session '{sess_name}' -> {merged.shape[0]} rows")
-
-        if not per_activity_rows:
-            if args.verbose:
-                print(f"No merged data produced for activity '{activity_name}'")
-            continue
+                lines.append(f"Processing activity '{activity_name}' with {len(sessions)} session(s)...")
+            planned.append((activity_name, find_session_tasks(sessions, args, log=lines.append), lines))
+
+        # one ordered stream of results across all activities; each activity takes its share
+        results = iter_session_results(
+            (task for _, tasks, _ in planned for task in tasks), args, executor, window=2 * jobs
+        )
+        for activity_name, tasks, lines in planned:
+            for line in lines:
+                print(line)
+            activity_results = itertools.islice(results, len(tasks))
+            # construct output filename with optional name prefix
+            if name_token:
+                out_stem = f"{name_token}_{activity_name}_combined"
+            else:
+                out_stem = f"{activity_name}_combined"
+
+            formats = [fmt for fmt in OUTPUT_FORMATS if args.format in (fmt, "both")]
+            out_paths = dict(zip(formats, make_unique_paths(
+                os.path.join(out_base, out_stem), (OUTPUT_FORMATS[fmt] for fmt in formats), args.overwrite
+            )))
+
+            merged_sessions = iter_merged_sessions(activity_results, args)
+            created: List[str] = []
+            try:
+                if args.global_sort:
+                    rows, processed_sessions = write_activity_sorted(out_paths, merged_sessions, created, args.verbose)
+                else:
+                    rows, processed_sessions = write_activity(out_paths, merged_sessions, created, args.verbose)
+            except Exception as e:
+                print(f"Failed to write activity '{activity_name}': {e}", file=sys.stderr)
+                # don't leave a truncated file behind; files the writer never opened are left alone
+                for path in created:
+                    if os.path.exists(path):
+                        os.remove(path)
+                continue
+            finally:
+                # keep the shared result stream aligned if the writer stopped early
+                for _ in activity_results:
+                    pass
 
-        # concat all sessions for this activity
-        activity_df = pd.concat(per_activity_rows, ignore_index=True, sort=False)
+            if processed_sessions == 0:
+                if args.verbose:
+                    print(f"No merged data produced for activity '{activity_name}'")
+                continue
 
-        # sort by timestamp if present
-        if "timestamp" in activity_df.columns:
-            try:
-                activity_df = activity_df.sort_values(by="timestamp").reset_index(drop=True)
-            except Exception:
-                pass
-
-        # construct output filename with optional name prefix
-        if name_token:
-            out_name = f"{name_token}_{activity_name}_combined.csv"
-        else:
-            out_name = f"{activity_name}_combined.csv"
-
-        out_path = os.path.join(out_base, out_name)
-        out_path = make_unique_path(out_path, args.overwrite)
-
-        # ensure column order: if add_session put it first
-        if args.add_session and "session" in activity_df.columns:
-            cols = ["session"] + [c for c in OUTPUT_COLS if c in activity_df.columns]
-        else:
-            cols = [c for c in OUTPUT_COLS if c in activity_df.columns]
-        activity_df.to_csv(out_path, index=False, columns=cols)
-        print(f"Wrote activity combined file: {out_path} ({activity_df.shape[0]} rows across {processed_sessions} session(s))")
-        total_processed_activities += 1
+            print(f"Wrote activity combined file: {', '.join(out_paths.values())} ({rows} rows across {processed_sessions} session(s))")
+            total_processed_activities += 1
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
 
     if total_processed_activities == 0:
         print("No activities were processed successfully.", file=sys.stderr)
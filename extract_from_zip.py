@@ -22,10 +22,14 @@ import os
 import sys
 import zipfile
 import shutil
-from typing import List, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 
 SENSOR_BASENAMES = {"accelerometer.csv", "gyroscope.csv"}
 
+# Read/write buffer used when copying entries out of a zip (default copyfileobj uses 64 KiB or less)
+COPY_BUFFER_SIZE = 1 << 20
+
 
 def normalize_basename(path: str) -> str:
     return os.path.basename(path).strip().lower()
@@ -47,30 +51,13 @@ def list_zip_files_in_dir(source_dir: str, recursive: bool = False) -> List[str]
     return zips
 
 
-def find_sensor_entries_in_zip(zip_path: str) -> List[str]:
-    """Return list of zip entry names that match sensor basenames (preserve entry names)."""
-    matches: List[str] = []
-    try:
-        with zipfile.ZipFile(zip_path, "r") as z:
-            for info in z.infolist():
-                if info.is_dir():
-                    continue
-                if normalize_basename(info.filename) in SENSOR_BASENAMES:
-                    matches.append(info.filename)
-    except zipfile.BadZipFile:
-        raise ValueError(f"Bad or unsupported zip file: {zip_path}")
-    return matches
-
-
-def prepare_dest_for_zip(dest_base: str, zip_path: str) -> str:
+def dest_dir_for_zip(dest_base: str, zip_path: str) -> str:
     """
-    Prepare destination directory for a given zip file.
+    Destination directory for a given zip file (created on first extracted entry).
     Layout: <dest_base>/<zip_basename_without_ext>
     """
     zip_basename = os.path.splitext(os.path.basename(zip_path))[0]
-    dest_dir = os.path.join(dest_base, zip_basename)
-    os.makedirs(dest_dir, exist_ok=True)
-    return dest_dir
+    return os.path.join(dest_base, zip_basename)
 
 
 def unique_target_path(dest_dir: str, basename: str, overwrite: bool) -> str:
@@ -91,27 +78,44 @@ def unique_target_path(dest_dir: str, basename: str, overwrite: bool) -> str:
     return target
 
 
-def extract_entries_from_zip(zip_path: str, entries: List[str], dest_dir: str, overwrite: bool) -> List[str]:
+def extract_sensor_csvs(zip_path: str, dest_dir: str, overwrite: bool, dry_run: bool = False) -> List[str]:
     """
-    Extract specified entries (full names inside zip) into dest_dir.
-    Returns list of extracted file paths.
+    Open zip_path once, find entries whose basenames match SENSOR_BASENAMES and extract
+    them into dest_dir. Returns list of extracted file paths, or with dry_run the matching
+    entry names inside the zip (nothing is written).
     """
-    extracted: List[str] = []
-    with zipfile.ZipFile(zip_path, "r") as z:
-        used = {}
-        for entry in entries:
-            orig_basename = os.path.basename(entry)
-            # ensure unique target name (handles multiple identical basenames inside zip)
-            target = unique_target_path(dest_dir, orig_basename, overwrite)
-            # track usage
-            used[orig_basename] = used.get(orig_basename, 0) + 1
+    results: List[str] = []
+    try:
+        z = zipfile.ZipFile(zip_path, "r")
+    except zipfile.BadZipFile:
+        raise ValueError(f"Bad or unsupported zip file: {zip_path}")
+    with z:
+        for info in z.infolist():
+            if info.is_dir() or normalize_basename(info.filename) not in SENSOR_BASENAMES:
+                continue
+            if dry_run:
+                results.append(info.filename)
+                continue
+            orig_basename = os.path.basename(info.filename)
+            created = None
             try:
-                with z.open(entry) as src, open(target, "wb") as dst:
-                    shutil.copyfileobj(src, dst)
-                extracted.append(target)
+                # open the entry first so an unreadable (encrypted/corrupt) one leaves no file behind
+                with z.open(info) as src:
+                    os.makedirs(dest_dir, exist_ok=True)
+                    # ensure unique target name (handles multiple identical basenames inside zip)
+                    target = unique_target_path(dest_dir, orig_basename, overwrite)
+                    dst = open(target, "wb", buffering=COPY_BUFFER_SIZE)
+                    created = target
+                    with dst:
+                        # no point allocating a 1 MiB buffer for a few-KiB file
+                        shutil.copyfileobj(src, dst, length=min(COPY_BUFFER_SIZE, info.file_size or COPY_BUFFER_SIZE))
+                results.append(target)
             except Exception as e:
-                raise RuntimeError(f"Failed to extract '{entry}' from '{zip_path}': {e}") from e
-    return extracted
+                # remove a partially written target
+                if created is not None and os.path.exists(created):
+                    os.remove(created)
+                raise RuntimeError(f"Failed to extract '{info.filename}' from '{zip_path}': {e}") from e
+    return results
 
 
 def process_all_zips(source_dir: str, dest_base: str, recursive: bool, list_only: bool, overwrite: bool, verbose: bool) -> Tuple[int, int]:
@@ -124,39 +128,58 @@ def process_all_zips(source_dir: str, dest_base: str, recursive: bool, list_only
             print(f"No zip files found in '{source_dir}'.")
         return 0, 0
 
-    total_extracted = 0
-    processed = 0
-    for zf in zip_files:
-        processed += 1
+    def _process_one(zf: str) -> Tuple[int, List[Tuple[str, bool]]]:
+        """Handle one zip; returns (files_extracted, [(message, is_error), ...]) for printing in order."""
+        messages: List[Tuple[str, bool]] = []
+        dest_dir = dest_dir_for_zip(dest_base, zf)
         try:
-            matches = find_sensor_entries_in_zip(zf)
+            extracted = extract_sensor_csvs(zf, dest_dir, overwrite=overwrite, dry_run=list_only)
         except ValueError as e:
-            print(f"Skipping '{zf}': {e}", file=sys.stderr)
-            continue
+            messages.append((f"Skipping '{zf}': {e}", True))
+            return 0, messages
+        except Exception as e:
+            messages.append((f"Error extracting from '{zf}': {e}", True))
+            return 0, messages
 
-        if not matches:
+        if not extracted:
             if verbose:
-                print(f"No sensor CSVs in '{zf}'.")
-            continue
+                messages.append((f"No sensor CSVs in '{zf}'.", False))
+            return 0, messages
 
-        dest_dir = prepare_dest_for_zip(dest_base, zf)
         if list_only:
-            print(f"Zip: {zf}")
-            for m in matches:
-                print(f"  {m}")
-            continue
+            messages.append((f"Zip: {zf}", False))
+            for m in extracted:
+                messages.append((f"  {m}", False))
+            return 0, messages
 
         if verbose:
-            print(f"Extracting from '{zf}' -> '{dest_dir}' ...")
-        try:
-            extracted = extract_entries_from_zip(zf, matches, dest_dir, overwrite=overwrite)
-            total_extracted += len(extracted)
-            if verbose:
-                for p in extracted:
-                    print("   -", p)
-        except Exception as e:
-            print(f"Error extracting from '{zf}': {e}", file=sys.stderr)
-            continue
+            messages.append((f"Extracting from '{zf}' -> '{dest_dir}' ...", False))
+            for p in extracted:
+                messages.append((f"   - {p}", False))
+        return len(extracted), messages
+
+    def _process_group(group: List[str]) -> List[Tuple[int, List[Tuple[str, bool]]]]:
+        """Handle zips sharing a destination folder one after another, in listing order."""
+        return [_process_one(zf) for zf in group]
+
+    # archives with the same basename (--recursive) extract into the same folder; keep each
+    # such group in one task so their files and _1, _2 suffixes come out as in a serial run
+    groups: Dict[str, List[str]] = {}
+    for zf in zip_files:
+        groups.setdefault(dest_dir_for_zip(dest_base, zf), []).append(zf)
+
+    # decompression (zlib releases the GIL) and file I/O overlap well across threads
+    total_extracted = 0
+    processed = 0
+    max_workers = min(len(groups), (os.cpu_count() or 1) * 2)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        # map yields results in group order; without duplicate basenames that is zip order
+        for group_results in ex.map(_process_group, groups.values()):
+            for count, messages in group_results:
+                processed += 1
+                total_extracted += count
+                for msg, is_error in messages:
+                    print(msg, file=sys.stderr if is_error else sys.stdout)
 
     return processed, total_extracted
 